@@ -1,5 +1,8 @@
 # app/api/endpoints/line_webhook.py
 
+import asyncio
+from typing import Set
+
 from fastapi import APIRouter, Request, HTTPException
 from linebot.v3.webhooks import MessageEvent, TextMessageContent, FollowEvent
 from linebot.v3.exceptions import InvalidSignatureError
@@ -10,7 +13,7 @@ from app.core.state_manager import bot_state
 # Service layer imports
 from app.services.gemini_service import load_persona
 from app.services.line_service import (
-    handler,
+    parser,
     reply_message,
     push_message_to_admin,
     start_youtube_bot,
@@ -21,15 +24,26 @@ from app.services.youtube_service import post_comment_manual
 
 router = APIRouter()
 
+# 実行中のイベント処理タスク。参照を保持しないとタスクが途中でGCされることがある
+background_tasks: Set[asyncio.Task] = set()
+
+
+def run_in_background(coro) -> asyncio.Task:
+    """イベント処理をバックグラウンドで実行し、完了するまで参照を保持する"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
 
 @router.post("/callback")
 async def line_webhook(request: Request):
     """LINEからのWebhookリクエストを受け取るエンドポイント"""
     # ★★★★★ ここが重要 ★★★★★
-    # handlerが正常に初期化されているか最初に確認する
-    if handler is None:
+    # parserが正常に初期化されているか最初に確認する
+    if parser is None:
         print(
-            "[CRITICAL ERROR] LINE Webhook handler is not initialized. Check LINE SDK settings in line_service.py and environment variables."
+            "[CRITICAL ERROR] LINE Webhook parser is not initialized. Check LINE SDK settings in line_service.py and environment variables."
         )
         # LINEプラットフォームには正常な応答を返し、エラーの連鎖を防ぐ
         # 500エラーを返すとLINEはリトライを試みるため、200 OKを返すのが望ましい
@@ -38,14 +52,22 @@ async def line_webhook(request: Request):
     signature = request.headers.get("X-Line-Signature")
     body = await request.body()
     try:
-        # line-bot-sdkのハンドラに処理を委譲
-        await handler.handle(body.decode(), signature)
+        # 署名検証とパースだけをここで行い、イベントの処理はバックグラウンドで実行する。
+        # 停止コマンドのように時間のかかる処理があっても、LINEにはすぐに200 OKを返す
+        events = parser.parse(body.decode(), signature)
+        for event in events:
+            if isinstance(event, MessageEvent) and isinstance(
+                event.message, TextMessageContent
+            ):
+                run_in_background(handle_text_message(event))
+            elif isinstance(event, FollowEvent):
+                run_in_background(handle_follow(event))
     except InvalidSignatureError:
         # 署名が無効な場合は400エラーを返す
         raise HTTPException(status_code=400, detail="Invalid signature")
     except Exception as e:
         # 予期せぬエラーを捕捉し、ログに記録
-        print(f"[ERROR] An exception occurred during handler.handle: {e}")
+        print(f"[ERROR] An exception occurred while handling webhook events: {e}")
         # この場合もLINEには200 OKを返す
 
     # 処理が正常に完了した場合、LINEに200 OKを返す
@@ -53,7 +75,6 @@ async def line_webhook(request: Request):
 
 
 # 友だち追加イベントのハンドラ
-@handler.add(FollowEvent)
 async def handle_follow(event: FollowEvent):
     """友だち追加イベントを処理する"""
     try:
@@ -67,7 +88,6 @@ async def handle_follow(event: FollowEvent):
 
 
 # テキストメッセージイベントのハンドラ
-@handler.add(MessageEvent, message=TextMessageContent)
 async def handle_text_message(event: MessageEvent):
     """
     テキストメッセージをコマンドとして処理する。
@@ -1,6 +1,6 @@
 # app/core/config.py
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -24,6 +24,38 @@ class Settings(BaseSettings):
         "https://www.googleapis.com/auth/youtube.force-ssl"
     ]
 
+    # --- APIエンドポイント (負荷試験などでローカルのスタブに向ける場合に変更) ---
+    YOUTUBE_API_ENDPOINT: Optional[str] = None
+    LINE_API_ENDPOINT: str = "https://api.line.me"
+
+    # --- 返信スケジューリング ---
+    # 予算とバッチサイズは 5,000コメント/分 の配信を想定して決めている。
+    # スーパーチャット/ステッカー約4% (200件/分) とメンバーシップ約2% (100件/分) に対し、
+    # 予約枠を除いた (50 - 10) 件 x 10回 = 400件/分 を優先度順に返信でき、3割強の余裕がある。
+    # 1分あたりにAI返信を投稿する上限
+    REPLY_BUDGET_PER_MINUTE: int = 10
+    # 1回の返信でまとめて扱うコメント数の上限
+    REPLY_BATCH_SIZE: int = 50
+    # 優先度クラスごとにバッチ内で確保する枠。上位クラスが混雑しても下位クラスに返信が回るようにする
+    REPLY_RESERVED_SLOTS: Dict[str, int] = {
+        "moderator": 5,
+        "sponsor": 3,
+        "normal": 2,
+    }
+    # 返信待ちキューの上限 (超えた分は優先度の低いものから破棄)。
+    # SLO内に届くコメント (5,000件/分 x 最長45秒程度) が収まる大きさにし、予約枠のあるクラスが破棄で枯渇しないようにする
+    REPLY_QUEUE_MAX_SIZE: int = 3000
+    # 返信スケジューラの統計を管理者に通知する間隔 (秒)
+    REPLY_STATS_INTERVAL_SECONDS: int = 300
+    # 優先度クラスごとのレイテンシSLO (秒)。これを超えたコメントには返信しない
+    REPLY_LATENCY_SLO_SECONDS: Dict[str, float] = {
+        "super_chat": 180.0,
+        "membership": 120.0,
+        "moderator": 60.0,
+        "sponsor": 45.0,
+        "normal": 30.0,
+    }
+
     # Secret Filesのパス (Render環境でのみ有効)
     SECRET_DIR: str = "/etc/secrets"
     CLIENT_SECRET_FILE: str = f"{SECRET_DIR}/client_secret.json"
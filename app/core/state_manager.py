@@ -1,7 +1,10 @@
 # app/core/state_manager.py (最終修正版)
 
 import asyncio
-from typing import Optional, Set
+from typing import TYPE_CHECKING, Optional, Set
+
+if TYPE_CHECKING:
+    from app.services.reply_scheduler import ReplyScheduler
 
 
 class BotState:
@@ -22,6 +25,8 @@ class BotState:
             self.bot_task: Optional[asyncio.Task] = None
             self.youtube_live_chat_id: Optional[str] = None
             self.comment_history: Set[str] = set()
+            # 稼働中のボットの返信スケジューラ (統計の参照用)
+            self.reply_scheduler: Optional["ReplyScheduler"] = None
             # ★ エラーの原因となっていたロック機能を追加
             self.lock = asyncio.Lock()
             self.initialized: bool = True
@@ -39,6 +44,7 @@ class BotState:
         self.is_running = False
         self.bot_task = None
         self.youtube_live_chat_id = None
+        self.reply_scheduler = None
         self.comment_history.clear()
 
 
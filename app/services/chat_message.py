@@ -0,0 +1,116 @@
+# app/services/chat_message.py
+
+from typing import List, Optional
+
+# orjson があれば高速なデコーダを使う (なければ標準の json にフォールバック)
+try:
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
+
+# liveChatMessages.list のパーシャルレスポンス指定。ボットが使うフィールドだけを要求する
+CHAT_LIST_FIELDS = (
+    "nextPageToken,pollingIntervalMillis,"
+    "items(id,"
+    "snippet(type,displayMessage,"
+    "superChatDetails/tier,superStickerDetails/tier),"
+    "authorDetails(displayName,isChatOwner,isChatModerator,isChatSponsor))"
+)
+
+
+class ChatMessage:
+    """ボットが利用するフィールドだけを保持するライブチャットのコメント"""
+
+    __slots__ = (
+        "id",
+        "type",
+        "author_name",
+        "text",
+        "is_owner",
+        "is_moderator",
+        "is_sponsor",
+        "tier",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        type: str,
+        author_name: str,
+        text: str,
+        is_owner: bool = False,
+        is_moderator: bool = False,
+        is_sponsor: bool = False,
+        tier: int = 0,
+    ):
+        self.id = id
+        self.type = type
+        self.author_name = author_name
+        self.text = text
+        self.is_owner = is_owner
+        self.is_moderator = is_moderator
+        self.is_sponsor = is_sponsor
+        # スーパーチャット/ステッカーのティア。金額と違い通貨に依存せず比較できる
+        self.tier = tier
+
+    @classmethod
+    def from_item(cls, item: dict) -> "ChatMessage":
+        """liveChatMessages の item からレコードを作成する"""
+        snippet = item.get("snippet") or {}
+        author = item.get("authorDetails") or {}
+        details = (
+            snippet.get("superChatDetails") or snippet.get("superStickerDetails") or {}
+        )
+        try:
+            tier = int(details.get("tier", 0))
+        except (TypeError, ValueError):
+            tier = 0
+        return cls(
+            id=item["id"],
+            type=snippet.get("type", "textMessageEvent"),
+            author_name=author.get("displayName", ""),
+            text=snippet.get("displayMessage", ""),
+            is_owner=bool(author.get("isChatOwner")),
+            is_moderator=bool(author.get("isChatModerator")),
+            is_sponsor=bool(author.get("isChatSponsor")),
+            tier=tier,
+        )
+
+    def __repr__(self) -> str:
+        return f"ChatMessage(id={self.id!r}, type={self.type!r}, author_name={self.author_name!r})"
+
+
+class ChatPage:
+    """liveChatMessages.list の1ページ分の結果"""
+
+    __slots__ = ("messages", "next_page_token", "polling_interval_millis")
+
+    def __init__(
+        self,
+        messages: List[ChatMessage],
+        next_page_token: Optional[str],
+        polling_interval_millis: int,
+    ):
+        self.messages = messages
+        self.next_page_token = next_page_token
+        self.polling_interval_millis = polling_interval_millis
+
+
+def parse_chat_page(content) -> ChatPage:
+    """レスポンスボディ (bytes または str) を ChatPage にデコードする"""
+    data = _loads(content)
+    from_item = ChatMessage.from_item
+    return ChatPage(
+        messages=[from_item(item) for item in data.get("items", ())],
+        next_page_token=data.get("nextPageToken"),
+        polling_interval_millis=data.get("pollingIntervalMillis", 15000),
+    )
+
+
+def chat_page_postproc(resp, content) -> ChatPage:
+    """
+    googleapiclient の HttpRequest.postproc として使うデコーダ。
+    汎用の JsonModel を経由せず、ボディを直接 ChatPage にする。
+    エラー応答は postproc が呼ばれる前に HttpRequest.execute が HttpError として送出する。
+    """
+    return parse_chat_page(content)
@@ -3,7 +3,7 @@
 import os
 import yaml
 import google.generativeai as genai
-from typing import Dict
+from typing import Dict, Optional
 from app.core.config import settings
 
 # APIキーを設定
@@ -46,8 +46,11 @@ def load_persona(persona_name: str) -> Dict:
         return yaml.safe_load(f)
 
 
-async def generate_reply(chat_history: str, system_instruction: str) -> str:
-    """AIによる返信を生成する (最新APIバージョン)"""
+async def generate_reply(chat_history: str, system_instruction: str) -> Optional[str]:
+    """
+    AIによる返信を生成する (最新APIバージョン)
+    生成に失敗した場合は None を返す (呼び出し側で再試行できるようにするため)
+    """
     try:
         # system_instruction を持つ一時的なモデルインスタンスを作成
         convo_model = genai.GenerativeModel(
@@ -60,4 +63,4 @@ async def generate_reply(chat_history: str, system_instruction: str) -> str:
         return response.text
     except Exception as e:
         print(f"Error generating reply: {e}")
-        return "すみません、ちょっと考えがまとまりませんでした…"
+        return None
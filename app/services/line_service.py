@@ -6,7 +6,7 @@ from typing import List
 
 # --- サードパーティライブラリのインポート ---
 from supabase import create_client, Client
-from linebot.v3 import WebhookHandler
+from linebot.v3 import WebhookParser
 from linebot.v3.messaging import (
     AsyncApiClient,
     AsyncMessagingApi,
@@ -34,17 +34,18 @@ except Exception as e:
 
 # LINE SDKの初期化
 try:
-    configuration = Configuration(access_token=settings.LINE_CHANNEL_ACCESS_TOKEN)
+    configuration = Configuration(
+        access_token=settings.LINE_CHANNEL_ACCESS_TOKEN, host=settings.LINE_API_ENDPOINT
+    )
     async_api_client = AsyncApiClient(configuration)
     line_bot_api = AsyncMessagingApi(async_api_client)
-    # ★★★★★ ここが重要 ★★★★★
-    # WebhookHandlerの初期化から async_mode=True を削除
-    handler = WebhookHandler(settings.LINE_CHANNEL_SECRET)
+    # 署名検証とイベントのパースだけを行う。イベントの処理は line_webhook で非同期に実行する
+    parser = WebhookParser(settings.LINE_CHANNEL_SECRET)
     print("LINE SDKの初期化に成功しました。")
 except Exception as e:
     print(f"LINE SDKの初期化中にエラーが発生しました: {e}")
     line_bot_api = None
-    handler = None
+    parser = None
 
 
 # --- ユーザーID管理 (Supabase対応) ---
@@ -0,0 +1,274 @@
+# app/services/reply_scheduler.py
+
+import heapq
+import itertools
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+from app.services.chat_message import ChatMessage
+
+# --- 優先度クラス ---
+# 値が小さいほど優先度が高い
+PRIORITY_SUPER_CHAT = 0
+PRIORITY_MEMBERSHIP = 1
+PRIORITY_MODERATOR = 2
+PRIORITY_SPONSOR = 3
+PRIORITY_NORMAL = 4
+
+PRIORITY_NAMES: Dict[int, str] = {
+    PRIORITY_SUPER_CHAT: "super_chat",
+    PRIORITY_MEMBERSHIP: "membership",
+    PRIORITY_MODERATOR: "moderator",
+    PRIORITY_SPONSOR: "sponsor",
+    PRIORITY_NORMAL: "normal",
+}
+
+# snippet.type ごとの優先度クラス
+EVENT_TYPE_PRIORITIES: Dict[str, int] = {
+    "superChatEvent": PRIORITY_SUPER_CHAT,
+    "superStickerEvent": PRIORITY_SUPER_CHAT,
+    "newSponsorEvent": PRIORITY_MEMBERSHIP,
+    "memberMilestoneChatEvent": PRIORITY_MEMBERSHIP,
+    "membershipGiftingEvent": PRIORITY_MEMBERSHIP,
+}
+
+
+def classify_message(message: ChatMessage) -> int:
+    """コメントの種類と投稿者の属性から優先度クラスを判定する"""
+    priority = EVENT_TYPE_PRIORITIES.get(message.type, PRIORITY_NORMAL)
+    if priority == PRIORITY_NORMAL:
+        if message.is_moderator:
+            priority = PRIORITY_MODERATOR
+        elif message.is_sponsor:
+            priority = PRIORITY_SPONSOR
+    return priority
+
+
+class QueuedMessage:
+    """返信待ちキューに積まれたコメント"""
+
+    __slots__ = ("message", "priority", "enqueued_at", "seq")
+
+    def __init__(
+        self, message: ChatMessage, priority: int, enqueued_at: float, seq: int
+    ):
+        self.message = message
+        self.priority = priority
+        self.enqueued_at = enqueued_at
+        self.seq = seq
+
+    def sort_key(self) -> tuple:
+        return (self.priority, -self.message.tier, self.seq)
+
+
+class ReplyScheduler:
+    """
+    コメントを優先度順に並べ、1分あたりの返信予算内で返信対象を選ぶスケジューラ。
+
+    - 優先度クラス内ではティアの高い順、次に到着の早い順に選ぶ。
+    - reserved_slots で指定したクラスには、バッチごとに最低限の枠を確保する。
+      残りの枠は優先度順に埋めるため、上位クラスが混雑しても下位クラスが枯渇しない。
+    - 各クラスのレイテンシSLOを超えて待たされたコメントは期限切れとして破棄する。
+    - キューが上限に達した場合は最も優先度の低いコメントから捨てる。
+    """
+
+    def __init__(
+        self,
+        replies_per_minute: int,
+        batch_size: int,
+        latency_slo_seconds: Dict[int, float],
+        max_queue_size: int,
+        reserved_slots: Optional[Dict[int, int]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.replies_per_minute = replies_per_minute
+        self.batch_size = batch_size
+        self.latency_slo_seconds = latency_slo_seconds
+        self.reserved_slots = reserved_slots or {}
+        self.max_queue_size = max_queue_size
+        self.clock = clock
+
+        self._heap: List[tuple] = []
+        self._counter = itertools.count()
+        self._reply_times: Deque[float] = deque()
+
+        # 優先度クラスごとの統計
+        self.answered: Dict[int, int] = {p: 0 for p in PRIORITY_NAMES}
+        self.expired: Dict[int, int] = {p: 0 for p in PRIORITY_NAMES}
+        self.dropped: Dict[int, int] = {p: 0 for p in PRIORITY_NAMES}
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def enqueue(self, message: ChatMessage) -> QueuedMessage:
+        """コメントをキューに追加する"""
+        queued = QueuedMessage(
+            message=message,
+            priority=classify_message(message),
+            enqueued_at=self.clock(),
+            seq=next(self._counter),
+        )
+        self._push(queued)
+        return queued
+
+    def _push(self, queued: QueuedMessage):
+        heapq.heappush(self._heap, (*queued.sort_key(), queued))
+        if len(self._heap) > self.max_queue_size:
+            # 期限切れのコメントを先に取り除き、まだ返信できるコメントを捨てないようにする
+            self._expire(self.clock())
+        while len(self._heap) > self.max_queue_size:
+            self._drop_lowest()
+
+    def _drop_lowest(self):
+        """最も優先度の低い (同順位なら最も新しい) コメントを捨てる"""
+        index = max(range(len(self._heap)), key=lambda i: self._heap[i][:3])
+        entry = self._heap[index]
+        last = self._heap.pop()
+        if index < len(self._heap):
+            self._heap[index] = last
+            heapq.heapify(self._heap)
+        self.dropped[entry[3].priority] += 1
+
+    def _expire(self, now: float):
+        """SLOを超えたコメントをキューから取り除く"""
+        before = len(self._heap)
+        kept = []
+        for entry in self._heap:
+            queued = entry[3]
+            slo = self.latency_slo_seconds.get(queued.priority)
+            if slo is not None and now - queued.enqueued_at > slo:
+                self.expired[queued.priority] += 1
+            else:
+                kept.append(entry)
+        if len(kept) != before:
+            heapq.heapify(kept)
+            self._heap = kept
+
+    def budget_available(self, now: Optional[float] = None) -> bool:
+        """直近1分間の返信数が予算内かどうか"""
+        if now is None:
+            now = self.clock()
+        while self._reply_times and now - self._reply_times[0] >= 60:
+            self._reply_times.popleft()
+        return len(self._reply_times) < self.replies_per_minute
+
+    def next_batch(self) -> List[QueuedMessage]:
+        """
+        返信予算が残っていれば、最大 batch_size 件を取り出す。
+        まず reserved_slots の枠を各クラスの上位コメントで埋め、残りを優先度順に埋める。
+        予算切れの場合は空リストを返し、コメントはキューに残したままにする。
+        返信の投稿に成功したら mark_replied、失敗したら requeue を呼ぶこと。
+        """
+        now = self.clock()
+        self._expire(now)
+        if not self._heap or not self.budget_available(now):
+            return []
+
+        if len(self._heap) <= self.batch_size:
+            batch = [entry[3] for entry in sorted(self._heap)]
+            self._heap = []
+            return batch
+
+        ordered = sorted(self._heap)
+        selected = [False] * len(ordered)
+        remaining = self.batch_size
+        reserved = dict(self.reserved_slots)
+        for i, entry in enumerate(ordered):
+            if remaining == 0:
+                break
+            priority = entry[0]
+            if reserved.get(priority, 0) > 0:
+                reserved[priority] -= 1
+                selected[i] = True
+                remaining -= 1
+        for i in range(len(ordered)):
+            if remaining == 0:
+                break
+            if not selected[i]:
+                selected[i] = True
+                remaining -= 1
+
+        batch = []
+        kept = []
+        for entry, chosen in zip(ordered, selected):
+            if chosen:
+                batch.append(entry[3])
+            else:
+                kept.append(entry)
+        # ソート済みのリストはそのままヒープ条件を満たす
+        self._heap = kept
+        return batch
+
+    def mark_replied(self, batch: List[QueuedMessage]):
+        """返信を投稿できたバッチを記録し、返信予算を消費する"""
+        self._reply_times.append(self.clock())
+        for queued in batch:
+            self.answered[queued.priority] += 1
+
+    def requeue(self, batch: List[QueuedMessage]):
+        """
+        返信できなかったバッチをキューに戻す。
+        到着時刻はそのまま引き継ぐため、SLOを超えたものは次回期限切れになる。
+        """
+        for queued in batch:
+            self._push(queued)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """優先度クラスごとの統計を返す"""
+        return {
+            name: {
+                "answered": self.answered[p],
+                "expired": self.expired[p],
+                "dropped": self.dropped[p],
+            }
+            for p, name in PRIORITY_NAMES.items()
+        }
+
+
+def create_reply_scheduler(
+    config, clock: Callable[[], float] = time.monotonic
+) -> ReplyScheduler:
+    """
+    設定から ReplyScheduler を作成する。
+    クラス名をキーにした設定値 (REPLY_LATENCY_SLO_SECONDS など) を優先度クラスに対応付ける。
+    """
+    priorities = {name: p for p, name in PRIORITY_NAMES.items()}
+    return ReplyScheduler(
+        replies_per_minute=config.REPLY_BUDGET_PER_MINUTE,
+        batch_size=config.REPLY_BATCH_SIZE,
+        latency_slo_seconds={
+            priorities[name]: seconds
+            for name, seconds in config.REPLY_LATENCY_SLO_SECONDS.items()
+        },
+        max_queue_size=config.REPLY_QUEUE_MAX_SIZE,
+        reserved_slots={
+            priorities[name]: slots
+            for name, slots in config.REPLY_RESERVED_SLOTS.items()
+        },
+        clock=clock,
+    )
+
+
+def format_stats(stats: Dict[str, Dict[str, int]]) -> str:
+    """統計をLINE通知用のテキストにする"""
+    lines = ["返信スケジューラの状況 (返信/期限切れ/破棄):"]
+    for name, counts in stats.items():
+        lines.append(
+            f"{name}: {counts['answered']} / {counts['expired']} / {counts['dropped']}"
+        )
+    return "\n".join(lines)
+
+
+def build_prompt(batch: List[QueuedMessage]) -> str:
+    """返信対象のコメントからGeminiに渡すチャット履歴を組み立てる"""
+    lines = []
+    for queued in batch:
+        message = queued.message
+        if queued.priority == PRIORITY_SUPER_CHAT:
+            lines.append(f"[スーパーチャット] {message.author_name}: {message.text}")
+        elif queued.priority == PRIORITY_MEMBERSHIP:
+            lines.append(f"[メンバーシップ] {message.author_name}: {message.text}")
+        else:
+            lines.append(f"{message.author_name}: {message.text}")
+    return "\n".join(lines) + "\n"
@@ -5,12 +5,26 @@ from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 import os
 import json
+import time
 from supabase import create_client, Client
-from typing import Callable, Optional
+from typing import Callable, List, Optional
 
 from app.core.config import settings
 from app.core.state_manager import bot_state
+from app.services.chat_message import CHAT_LIST_FIELDS, chat_page_postproc
 from app.services.gemini_service import generate_reply, load_persona
+from app.services.reply_scheduler import (
+    build_prompt,
+    create_reply_scheduler,
+    format_stats,
+)
+
+# LINEのテキストメッセージ1件あたりの最大文字数
+LINE_TEXT_LIMIT = 5000
+
+# 接続の切断 (アイドル中にサーバーが閉じた keep-alive 接続など) や 5xx 時の再試行回数。
+# 再送しても結果が変わらない読み取り系のリクエストにだけ使う
+YOUTUBE_API_NUM_RETRIES = 3
 
 # Supabaseクライアントの初期化
 try:
@@ -54,11 +68,18 @@ def get_credentials() -> Optional[Credentials]:
         return None
 
 
+def _client_options() -> Optional[dict]:
+    if settings.YOUTUBE_API_ENDPOINT:
+        return {"api_endpoint": settings.YOUTUBE_API_ENDPOINT}
+    return None
+
+
 def get_youtube_client(credentials: Credentials):
     return googleapiclient.discovery.build(
         settings.YOUTUBE_API_SERVICE_NAME,
         settings.YOUTUBE_API_VERSION,
         credentials=credentials,
+        client_options=_client_options(),
     )
 
 
@@ -67,9 +88,25 @@ def get_youtube_client_readonly():
         settings.YOUTUBE_API_SERVICE_NAME,
         settings.YOUTUBE_API_VERSION,
         developerKey=settings.YOUTUBE_API_KEY,
+        client_options=_client_options(),
     )
 
 
+def chunk_lines(lines: List[str], limit: int) -> List[str]:
+    """行のリストを、1件あたり limit 文字以内のテキストにまとめる"""
+    chunks = []
+    current = ""
+    for line in lines:
+        line = line[:limit]
+        if current and len(current) + 1 + len(line) > limit:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        chunks.append(current)
+    return chunks
+
+
 async def run_bot_cycle(notifier: Callable[[str], asyncio.Task]):
     """ボットのメイン処理ループ"""
     await notifier("ボットのメインループを開始します。")
@@ -129,6 +166,9 @@ async def run_bot_cycle(notifier: Callable[[str], asyncio.Task]):
     except Exception as e:
         await notifier(f"挨拶コメントの投稿に失敗しました: {e}")
 
+    scheduler = create_reply_scheduler(settings)
+    bot_state.reply_scheduler = scheduler
+    stats_reported_at = time.monotonic()
     next_page_token = None
     while bot_state.is_running:
         try:
@@ -139,43 +179,72 @@ async def run_bot_cycle(notifier: Callable[[str], asyncio.Task]):
             chat_request = youtube_readonly.liveChatMessages().list(
                 liveChatId=live_chat_id,
                 part="snippet,authorDetails",
+                fields=CHAT_LIST_FIELDS,
                 pageToken=next_page_token,
             )
-            chat_response = chat_request.execute()
-            new_messages = chat_response.get("items", [])
-            next_page_token = chat_response.get("nextPageToken")
-            polling_interval = chat_response.get("pollingIntervalMillis", 15000) / 1000
-
-            chat_history_for_gemini = ""
-            for item in new_messages:
-                comment_id = item["id"]
-                if comment_id in bot_state.comment_history:
-                    continue
+            # 汎用の JSON デコードを通さず、直接 ChatMessage に変換する
+            chat_request.postproc = chat_page_postproc
+            # 大量のコメントを受け取る場合でもイベントループを止めないよう別スレッドで実行する
+            loop = asyncio.get_running_loop()
+            chat_page = await loop.run_in_executor(
+                None, lambda: chat_request.execute(num_retries=YOUTUBE_API_NUM_RETRIES)
+            )
+            next_page_token = chat_page.next_page_token
+            polling_interval = chat_page.polling_interval_millis / 1000
 
-                author_name = item["authorDetails"]["displayName"]
-                message_text = item["snippet"]["displayMessage"]
+            chat_log = []
+            for message in chat_page.messages:
+                if message.id in bot_state.comment_history:
+                    continue
 
-                if item["authorDetails"]["isChatOwner"]:
-                    bot_state.comment_history.add(comment_id)
+                if message.is_owner:
+                    bot_state.comment_history.add(message.id)
                     continue
 
-                await notifier(f"[{author_name}]: {message_text}")
-                bot_state.comment_history.add(comment_id)
-                chat_history_for_gemini += f"{author_name}: {message_text}\n"
-
-            if chat_history_for_gemini:
-                persona_data = load_persona(bot_state.current_persona)
-                system_instruction = persona_data.get(
-                    "system_instruction", "You are a helpful assistant."
-                )
-                ai_reply = await generate_reply(
-                    chat_history_for_gemini, system_instruction
-                )
-                if ai_reply and ai_reply.strip():
-                    await asyncio.sleep(2)
-                    await post_comment(youtube_write, live_chat_id, ai_reply)
+                chat_log.append(f"[{message.author_name}]: {message.text}")
+                bot_state.comment_history.add(message.id)
+                scheduler.enqueue(message)
+
+            # コメントは1件ずつではなくポーリングごとにまとめて通知する
+            for text in chunk_lines(chat_log, LINE_TEXT_LIMIT):
+                await notifier(text)
+
+            # 返信予算の範囲で、優先度の高いコメントから返信対象を選ぶ
+            batch = scheduler.next_batch()
+            if batch:
+                ai_reply = None
+                try:
+                    persona_data = load_persona(bot_state.current_persona)
+                    system_instruction = persona_data.get(
+                        "system_instruction", "You are a helpful assistant."
+                    )
+                    ai_reply = await generate_reply(
+                        build_prompt(batch), system_instruction
+                    )
+                    if ai_reply and ai_reply.strip():
+                        await asyncio.sleep(2)
+                        await post_comment(youtube_write, live_chat_id, ai_reply)
+                    else:
+                        ai_reply = None
+                except Exception:
+                    # 投稿できなかったコメントはキューに戻して次回に回す
+                    scheduler.requeue(batch)
+                    raise
+
+                # 投稿に成功した後の処理は、失敗時の再投入 (except) の対象外にする
+                if ai_reply is None:
+                    scheduler.requeue(batch)
+                else:
+                    scheduler.mark_replied(batch)
                     await notifier(f"[AI {bot_state.current_persona}]: {ai_reply}")
 
+            if (
+                time.monotonic() - stats_reported_at
+                >= settings.REPLY_STATS_INTERVAL_SECONDS
+            ):
+                await notifier(format_stats(scheduler.stats()))
+                stats_reported_at = time.monotonic()
+
             await asyncio.sleep(polling_interval)
         except asyncio.CancelledError:
             await notifier("ボットのタスクがキャンセルされました。")
@@ -188,23 +257,26 @@ async def run_bot_cycle(notifier: Callable[[str], asyncio.Task]):
 async def post_comment(youtube_client, live_chat_id: str, text: str):
     if not text.strip():
         return
-    loop = asyncio.get_running_loop()
-    await loop.run_in_executor(
-        None,
-        lambda: youtube_client.liveChatMessages()
-        .insert(
-            part="snippet",
-            body={
-                "snippet": {
-                    "liveChatId": live_chat_id,
-                    "type": "textMessageEvent",
-                    "textMessageDetails": {"messageText": text},
-                }
-            },
-        )
-        .execute(),
+    request = youtube_client.liveChatMessages().insert(
+        part="snippet",
+        body={
+            "snippet": {
+                "liveChatId": live_chat_id,
+                "type": "textMessageEvent",
+                "textMessageDetails": {"messageText": text},
+            }
+        },
     )
 
+    def execute():
+        # 投稿は再送すると二重投稿になるため num_retries は使わない。
+        # 代わりに投稿のたびに接続を張り直し、アイドル中にサーバーが閉じた keep-alive 接続を使わないようにする
+        request.http.close()
+        return request.execute()
+
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, execute)
+
 
 async def post_comment_manual(text: str) -> bool:
     if not bot_state.is_running or not bot_state.youtube_live_chat_id:
@@ -0,0 +1,180 @@
+# tools/bench_chat_parse.py
+"""
+liveChatMessages.list のレスポンス処理のベンチマーク。
+
+以下の3通りを比較し、レスポンスボディのサイズ・パース時間・1メッセージあたりのメモリを表示する。
+
+- フルペイロード + 標準 json で dict のまま保持 (従来の方式)
+- フルペイロード + parse_chat_page (デコーダと ChatMessage の効果のみ)
+- fields= パーシャルレスポンス + parse_chat_page (現行の方式)
+
+body bytes は非圧縮の JSON ボディの大きさであり、実際の通信量 (gzip 後) ではない。
+
+使い方:
+    python -m tools.bench_chat_parse [--items 2000] [--repeat 20]
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from app.services.chat_message import _loads, parse_chat_page
+from tools.sim_traffic import random_author_flags, random_event_type, random_tier
+
+
+def make_full_item(index: int, rng: random.Random) -> dict:
+    """YouTube Data API が part=snippet,authorDetails で返すのと同じ形の item を作る"""
+    channel_id = f"UC{rng.getrandbits(110):028x}"[:24]
+    event_type = random_event_type(rng)
+    is_moderator, is_sponsor = random_author_flags(rng)
+    text = "コメント" * rng.randint(1, 12)
+    snippet = {
+        "type": event_type,
+        "liveChatId": "Cg0KC2xpdmVfY2hhdF9pZCoCCAE",
+        "authorChannelId": channel_id,
+        "publishedAt": "2024-05-01T12:34:56.789012+00:00",
+        "hasDisplayContent": True,
+        "displayMessage": text,
+        "textMessageDetails": {"messageText": text},
+    }
+    if event_type == "superChatEvent":
+        snippet["superChatDetails"] = {
+            "amountMicros": str(rng.choice([100, 500, 1000, 10000]) * 1_000_000),
+            "currency": "JPY",
+            "amountDisplayString": "¥1,000",
+            "userComment": text,
+            "tier": random_tier(rng, event_type),
+        }
+    elif event_type == "superStickerEvent":
+        snippet["superStickerDetails"] = {
+            "superStickerMetadata": {
+                "stickerId": "sticker_id",
+                "altText": "sticker",
+                "language": "ja",
+            },
+            "amountMicros": "500000000",
+            "currency": "JPY",
+            "amountDisplayString": "¥500",
+            "tier": random_tier(rng, event_type),
+        }
+    return {
+        "kind": "youtube#liveChatMessage",
+        "etag": f"{rng.getrandbits(128):032x}",
+        "id": f"LCC.{index:08d}{rng.getrandbits(64):016x}",
+        "snippet": snippet,
+        "authorDetails": {
+            "channelId": channel_id,
+            "channelUrl": f"http://www.youtube.com/channel/{channel_id}",
+            "displayName": f"視聴者{index}",
+            "profileImageUrl": f"https://yt4.ggpht.com/ytc/{rng.getrandbits(256):064x}=s88-c-k-c0x00ffffff-no-rj",
+            "isVerified": False,
+            "isChatOwner": False,
+            "isChatSponsor": is_sponsor,
+            "isChatModerator": is_moderator,
+        },
+    }
+
+
+def project_item(item: dict) -> dict:
+    """CHAT_LIST_FIELDS で要求した場合にサーバーが返すフィールドだけを残す"""
+    snippet = item["snippet"]
+    author = item["authorDetails"]
+    projected_snippet = {
+        "type": snippet["type"],
+        "displayMessage": snippet["displayMessage"],
+    }
+    for key in ("superChatDetails", "superStickerDetails"):
+        if key in snippet:
+            projected_snippet[key] = {"tier": snippet[key]["tier"]}
+    return {
+        "id": item["id"],
+        "snippet": projected_snippet,
+        "authorDetails": {
+            key: author[key]
+            for key in ("displayName", "isChatOwner", "isChatModerator", "isChatSponsor")
+        },
+    }
+
+
+def make_pages(items: int, seed: int = 0):
+    rng = random.Random(seed)
+    full_items = [make_full_item(i, rng) for i in range(items)]
+    full_page = {
+        "kind": "youtube#liveChatMessageListResponse",
+        "etag": "etag",
+        "pollingIntervalMillis": 5000,
+        "pageInfo": {"totalResults": items, "resultsPerPage": items},
+        "nextPageToken": "GOCYp8SZ_YQDIPHq_8OZ_YQD",
+        "items": full_items,
+    }
+    projected_page = {
+        "nextPageToken": full_page["nextPageToken"],
+        "pollingIntervalMillis": full_page["pollingIntervalMillis"],
+        "items": [project_item(item) for item in full_items],
+    }
+    return (
+        json.dumps(full_page, ensure_ascii=False).encode("utf-8"),
+        json.dumps(projected_page, ensure_ascii=False).encode("utf-8"),
+    )
+
+
+def parse_generic(content: bytes) -> list:
+    """従来の処理: 汎用 JSON デコードで dict のまま保持する"""
+    return json.loads(content.decode("utf-8")).get("items", [])
+
+
+def parse_compact(content: bytes) -> list:
+    """現行の処理: ボディを ChatMessage にデコードする"""
+    return parse_chat_page(content).messages
+
+
+def time_parse(parse, content: bytes, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(content)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure_memory(parse, content: bytes) -> int:
+    tracemalloc.start()
+    try:
+        result = parse(content)
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=2000, help="1ページのコメント数")
+    parser.add_argument("--repeat", type=int, default=20, help="計測の繰り返し回数")
+    args = parser.parse_args()
+
+    full, projected = make_pages(args.items)
+    rows = [
+        ("full + json.loads", parse_generic, full),
+        ("full + ChatMessage", parse_compact, full),
+        ("fields= + ChatMessage", parse_compact, projected),
+    ]
+
+    print(f"items per page: {args.items}")
+    print(f"decoder: {_loads.__module__}")
+    print("body bytes = uncompressed JSON body size, not measured on-the-wire bytes")
+    print(f"{'mode':<24}{'body bytes':>12}{'parse ms':>12}{'bytes/msg':>12}")
+    for name, parse, content in rows:
+        seconds = time_parse(parse, content, args.repeat)
+        memory = measure_memory(parse, content)
+        print(
+            f"{name:<24}{len(content):>12,}{seconds * 1000:>12.2f}"
+            f"{memory // args.items:>12,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
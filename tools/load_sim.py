@@ -0,0 +1,687 @@
+# tools/load_sim.py
+"""
+オフラインのチャット負荷シミュレータ兼レイテンシSLO試験。
+
+YouTube / Gemini / LINE のローカルスタブを立ち上げ、
+ライブチャットのトラフィック (既定 5,000 コメント/分) を生成しながら
+run_bot_cycle と /api/v1/line/callback を同時に動かす。
+最後に LINE から「停止」を送り、ボットが停止することまで確認する。
+終了時に以下のSLOを検査し、違反があれば終了コード 1 で終わる。
+
+- 生成したすべてのコメントのうち、返信されずに優先度クラスのSLO + 許容時間を過ぎた件数
+  (スーパーチャット / メンバーシップ)。終了時点でまだ期限内のコメントは数えない
+- 返信されたコメントのレイテンシ (優先度クラスのSLO + 許容時間以内 / 返信処理 p95)
+- すべての LINE コマンドに返信されていること、コマンド→返信の p99
+- アプリがエラーをログ出力・LINE通知していないこと
+- コメントがボットに取得されるまでの遅延 p99
+- Webhook 応答時間 p99
+- イベントループの遅延 p99
+- RSS の増加量
+
+スーパーチャットのSLO (180秒) を2周以上観測できるよう、既定の実行時間は 360 秒にしている。
+
+使い方 (リポジトリのルートで実行):
+    python -m tools.load_sim [--duration 360] [--chat-rate 5000] [--line-rate 600]
+"""
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import io
+import hashlib
+import hmac
+import json
+import math
+import os
+import random
+import re
+import resource
+import socket
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from tools.sim_traffic import (
+    SETTINGS_ENV_DEFAULTS,
+    random_author_flags,
+    random_event_type,
+    random_tier,
+)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT_DIR, "app")
+
+LINE_CHANNEL_SECRET = SETTINGS_ENV_DEFAULTS["LINE_CHANNEL_SECRET"]
+
+# 実行中に繰り返し送るコマンド。「起動」は稼働中なので「既に起動しています」と返る
+LINE_COMMANDS = ["ペルソナ default", "ペルソナ genshin", "起動", "こんにちは！", "888888"]
+# 最後に送るコマンド
+LINE_STOP_COMMAND = "停止"
+
+REPLY_PATTERN = re.compile(r"sim-reply-(\d+)")
+SEQ_PATTERN = re.compile(r"#(\d+)")
+ERROR_PATTERN = re.compile(r"error|failed", re.IGNORECASE)
+NOTIFIED_ERROR_PATTERN = re.compile(r"エラー|失敗")
+
+
+class AppLog(io.StringIO):
+    """アプリの標準出力を記録する。echo が真ならそのまま表示もする"""
+
+    def __init__(self, echo: bool):
+        super().__init__()
+        self.echo = echo
+
+    def write(self, text: str) -> int:
+        if self.echo:
+            sys.__stdout__.write(text)
+        return super().write(text)
+
+    def error_lines(self) -> List[str]:
+        return [line for line in self.getvalue().splitlines() if ERROR_PATTERN.search(line)]
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, math.ceil(p / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def current_rss() -> int:
+    """現在の RSS (バイト)。/proc が無い環境では最大 RSS で代用する"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class StandIn:
+    """YouTube / Gemini / LINE のローカルスタブ。受け取ったリクエストを記録する"""
+
+    def __init__(
+        self,
+        chat_rate_per_minute: int,
+        polling_interval_millis: int,
+        gemini_latency: float,
+        seed: int,
+    ):
+        self.chat_rate = chat_rate_per_minute / 60
+        self.polling_interval_millis = polling_interval_millis
+        self.gemini_latency = gemini_latency
+        self.rng = random.Random(seed)
+        self.started_at: Optional[float] = None
+
+        self.items: List[dict] = []
+        self.published_at: List[float] = []
+        self.fetch_lags: List[float] = []
+        self.fetched = 0
+        # reply_id -> (Gemini が呼ばれた時刻, 返信対象のコメント番号)
+        self.gemini_calls: Dict[int, tuple] = {}
+        # reply_id -> 返信が投稿された時刻
+        self.replies_posted: Dict[int, float] = {}
+        self.line_pushes = 0
+        self.line_replies = 0
+        # replyToken -> LINE に返信された時刻
+        self.line_replied_at: Dict[str, float] = {}
+        self.last_notification = ""
+        # ボットが管理者に通知したエラー
+        self.error_notifications: List[str] = []
+
+    def _make_item(self, seq: int) -> dict:
+        rng = self.rng
+        event_type = random_event_type(rng)
+        is_moderator, is_sponsor = random_author_flags(rng)
+        snippet = {
+            "type": event_type,
+            "displayMessage": f"{'わこつ' * rng.randint(1, 5)} #{seq}",
+        }
+        if event_type == "superChatEvent":
+            snippet["superChatDetails"] = {"tier": random_tier(rng, event_type)}
+        elif event_type == "superStickerEvent":
+            snippet["superStickerDetails"] = {"tier": random_tier(rng, event_type)}
+        return {
+            "id": f"sim-message-{seq}",
+            "snippet": snippet,
+            "authorDetails": {
+                "displayName": f"視聴者{rng.randint(1, 3000)}",
+                "isChatOwner": False,
+                "isChatModerator": is_moderator,
+                "isChatSponsor": is_sponsor,
+            },
+        }
+
+    def _generate(self):
+        """経過時間に応じてコメントを生成する"""
+        now = time.monotonic()
+        if self.started_at is None:
+            self.started_at = now
+        target = int((now - self.started_at) * self.chat_rate)
+        for seq in range(len(self.items), target):
+            self.items.append(self._make_item(seq))
+            self.published_at.append(self.started_at + seq / self.chat_rate)
+
+    def record_unfetched_lag(self):
+        """終了時点でまだ取得されていない最も古いコメントの経過時間を記録する"""
+        if self.started_at is None:
+            return
+        oldest = self.started_at + self.fetched / self.chat_rate
+        self.fetch_lags.append(max(0.0, time.monotonic() - oldest))
+
+    def create_app(self):
+        from fastapi import FastAPI, Request
+
+        api = FastAPI()
+
+        # --- YouTube Data API ---
+        @api.get("/youtube/v3/search")
+        async def search():
+            return {"items": [{"id": {"videoId": "sim-video"}}]}
+
+        @api.get("/youtube/v3/videos")
+        async def videos():
+            return {
+                "items": [{"liveStreamingDetails": {"activeLiveChatId": "sim-chat"}}]
+            }
+
+        @api.get("/youtube/v3/liveChat/messages")
+        async def list_messages(pageToken: Optional[str] = None):
+            self._generate()
+            start = int(pageToken) if pageToken else len(self.items)
+            if start < len(self.items):
+                # 取得されるまで最も長く待たされたコメントの経過時間
+                self.fetch_lags.append(time.monotonic() - self.published_at[start])
+            self.fetched = len(self.items)
+            return {
+                "nextPageToken": str(len(self.items)),
+                "pollingIntervalMillis": self.polling_interval_millis,
+                "items": self.items[start:],
+            }
+
+        @api.post("/youtube/v3/liveChat/messages")
+        async def insert_message(request: Request):
+            body = await request.json()
+            text = body["snippet"]["textMessageDetails"]["messageText"]
+            match = REPLY_PATTERN.search(text)
+            if match:
+                self.replies_posted[int(match.group(1))] = time.monotonic()
+            return body
+
+        # --- Gemini ---
+        @api.post("/gemini/v1beta/models/{model}")
+        async def generate_content(model: str, request: Request):
+            body = await request.json()
+            prompt = body["contents"][0]["parts"][0]["text"]
+            reply_id = len(self.gemini_calls)
+            seqs = [int(s) for s in SEQ_PATTERN.findall(prompt)]
+            self.gemini_calls[reply_id] = (time.monotonic(), seqs)
+            await asyncio.sleep(self.gemini_latency)
+            text = f"ご視聴ありがとうございます！ sim-reply-{reply_id}"
+            return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+
+        # --- LINE Messaging API ---
+        @api.post("/line/v2/bot/message/push")
+        async def push_message(request: Request):
+            body = await request.json()
+            self.last_notification = body["messages"][0]["text"]
+            if NOTIFIED_ERROR_PATTERN.search(self.last_notification):
+                self.error_notifications.append(self.last_notification)
+            self.line_pushes += 1
+            return {"sentMessages": [{"id": str(self.line_pushes)}]}
+
+        @api.post("/line/v2/bot/message/reply")
+        async def reply_message(request: Request):
+            body = await request.json()
+            self.line_replied_at[body["replyToken"]] = time.monotonic()
+            self.line_replies += 1
+            return {"sentMessages": [{"id": str(self.line_replies)}]}
+
+        return api
+
+
+def start_stand_in(stand_in: StandIn, port: int):
+    """スタブを別スレッドのイベントループで起動する"""
+    import uvicorn
+
+    config = uvicorn.Config(
+        stand_in.create_app(),
+        host="127.0.0.1",
+        port=port,
+        log_level="warning",
+        lifespan="off",
+    )
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread
+
+
+def configure_environment(base_url: str):
+    """アプリの設定をスタブに向ける (app をインポートする前に呼ぶ)"""
+    os.environ.update(SETTINGS_ENV_DEFAULTS)
+    os.environ.update(
+        {
+            "LINE_API_ENDPOINT": f"{base_url}/line",
+            "YOUTUBE_API_ENDPOINT": f"{base_url}/",
+            "BASE_URL": base_url,
+            "SUPABASE_URL": f"{base_url}/supabase",
+            "SUPABASE_KEY": "sim.sim.sim",
+        }
+    )
+    # ペルソナは app/ からの相対パスで読み込まれる
+    os.chdir(APP_DIR)
+    if ROOT_DIR not in sys.path:
+        sys.path.insert(0, ROOT_DIR)
+
+
+def reply_token(index: int) -> str:
+    return f"sim-reply-token-{index}"
+
+
+def build_webhook_body(index: int, text: str) -> bytes:
+    event = {
+        "type": "message",
+        "mode": "active",
+        "timestamp": int(time.time() * 1000),
+        "source": {"type": "user", "userId": "Usimadmin"},
+        "webhookEventId": f"sim-event-{index}",
+        "deliveryContext": {"isRedelivery": False},
+        "replyToken": reply_token(index),
+        "message": {
+            "id": str(index),
+            "type": "text",
+            "quoteToken": f"sim-quote-{index}",
+            "text": text,
+        },
+    }
+    body = {"destination": "Usimbot", "events": [event]}
+    return json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+
+def sign(body: bytes) -> str:
+    digest = hmac.new(LINE_CHANNEL_SECRET.encode(), body, hashlib.sha256).digest()
+    return base64.b64encode(digest).decode()
+
+
+async def send_webhook(
+    client, index: int, text: str, latencies: List[float], sent_at: Dict[str, float]
+):
+    """署名付きの Webhook を1件送り、応答時間と送信時刻を記録する"""
+    body = build_webhook_body(index, text)
+    start = time.monotonic()
+    sent_at[reply_token(index)] = start
+    response = await client.post(
+        "/api/v1/line/callback",
+        content=body,
+        headers={"X-Line-Signature": sign(body), "Content-Type": "application/json"},
+    )
+    latencies.append(time.monotonic() - start)
+    response.raise_for_status()
+
+
+async def drive_webhook(
+    client,
+    rate_per_minute: int,
+    duration: float,
+    latencies: List[float],
+    sent_at: Dict[str, float],
+) -> int:
+    """LINE からの Webhook を一定間隔で (応答を待たずに) 送り続け、送った件数を返す"""
+    interval = 60 / rate_per_minute
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + duration
+    tasks = []
+    index = 0
+    while loop.time() < deadline:
+        text = LINE_COMMANDS[index % len(LINE_COMMANDS)]
+        tasks.append(
+            asyncio.create_task(send_webhook(client, index, text, latencies, sent_at))
+        )
+        index += 1
+        await asyncio.sleep(interval)
+    await asyncio.gather(*tasks)
+    return index
+
+
+async def monitor_loop_lag(samples: List[float], interval: float = 0.05):
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - start - interval))
+
+
+async def run_simulation(args, stand_in: StandIn, base_url: str) -> dict:
+    import httpx
+    from google.oauth2.credentials import Credentials
+
+    from app.api.endpoints import line_webhook
+    from app.core.state_manager import bot_state
+    from app.main import app
+    from app.services import line_service, youtube_service
+
+    gemini_client = httpx.AsyncClient(base_url=f"{base_url}/gemini")
+
+    async def generate_reply(chat_history: str, system_instruction: str) -> str:
+        # google-generativeai は gRPC で通信するため、HTTP のスタブを直接呼ぶ
+        response = await gemini_client.post(
+            "/v1beta/models/gemini-1.5-flash:generateContent",
+            json={
+                "systemInstruction": {"parts": [{"text": system_instruction}]},
+                "contents": [{"role": "user", "parts": [{"text": chat_history}]}],
+            },
+        )
+        return response.json()["candidates"][0]["content"]["parts"][0]["text"]
+
+    # トークンは Supabase に保存されているため、ダミーの認証情報を使う
+    youtube_service.get_credentials = lambda: Credentials(token="sim-token")
+    youtube_service.generate_reply = generate_reply
+
+    lag_samples: List[float] = []
+    lag_task = asyncio.create_task(monitor_loop_lag(lag_samples))
+    rss_start = current_rss()
+
+    webhook_latencies: List[float] = []
+    webhook_sent_at: Dict[str, float] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+        line_service.start_youtube_bot()
+        sent = await drive_webhook(
+            client, args.line_rate, args.duration, webhook_latencies, webhook_sent_at
+        )
+        # Webhook は応答後にイベントを処理するため、処理が終わるのを待つ
+        await asyncio.gather(*line_webhook.background_tasks)
+
+        # 停止前の状態を記録してから、LINE の「停止」コマンドでボットを止める
+        measured_until = time.monotonic()
+        stand_in.record_unfetched_lag()
+        scheduler = bot_state.reply_scheduler
+        reply_stats = scheduler.stats() if scheduler else {}
+        class_slo_seconds = scheduler.latency_slo_seconds if scheduler else {}
+        bot_task = bot_state.bot_task
+        bot_stopped_early = not bot_state.is_running
+        await send_webhook(
+            client, sent, LINE_STOP_COMMAND, webhook_latencies, webhook_sent_at
+        )
+        await asyncio.gather(*line_webhook.background_tasks)
+        if bot_task:
+            await asyncio.gather(bot_task, return_exceptions=True)
+        bot_stopped = not bot_state.is_running and (bot_task is None or bot_task.done())
+
+    lag_task.cancel()
+    await gemini_client.aclose()
+    await line_service.async_api_client.close()
+
+    return {
+        "webhook_latencies": webhook_latencies,
+        "webhook_sent_at": webhook_sent_at,
+        "measured_until": measured_until,
+        "bot_stopped": bot_stopped,
+        "lag_samples": lag_samples,
+        "rss_growth": current_rss() - rss_start,
+        "bot_stopped_early": bot_stopped_early,
+        "reply_stats": reply_stats,
+        "class_slo_seconds": class_slo_seconds,
+    }
+
+
+def comment_outcomes(stand_in: StandIn, result: dict, allowance: float):
+    """
+    生成したすべてのコメントについて、優先度クラスごとに返信の結果を集計する。
+
+    各コメントの期限は優先度クラスのSLO + allowance。返信されずに計測終了時点で期限を
+    過ぎたコメントと、期限を過ぎてから返信されたコメントを取りこぼし (missed) とする。
+    計測終了時点でまだ期限内かつ未返信のコメントはどの件数にも含めない。
+    戻り値は (クラスごとの件数, クラスごとの返信レイテンシ, Gemini呼び出しから投稿までの時間)
+    """
+    from app.services.chat_message import ChatMessage
+    from app.services.reply_scheduler import PRIORITY_NAMES, classify_message
+
+    answered_at: Dict[int, float] = {}
+    pipeline: List[float] = []
+    for reply_id, posted_at in stand_in.replies_posted.items():
+        called_at, seqs = stand_in.gemini_calls[reply_id]
+        pipeline.append(posted_at - called_at)
+        for seq in seqs:
+            answered_at.setdefault(seq, posted_at)
+
+    counts = {p: {"due": 0, "answered": 0, "missed": 0} for p in PRIORITY_NAMES}
+    latencies: Dict[int, List[float]] = {p: [] for p in PRIORITY_NAMES}
+    for seq, item in enumerate(stand_in.items):
+        priority = classify_message(ChatMessage.from_item(item))
+        deadline = (
+            stand_in.published_at[seq]
+            + result["class_slo_seconds"].get(priority, math.inf)
+            + allowance
+        )
+        posted_at = answered_at.get(seq)
+        if posted_at is None and deadline > result["measured_until"]:
+            continue
+        counts[priority]["due"] += 1
+        if posted_at is not None:
+            counts[priority]["answered"] += 1
+            latencies[priority].append(posted_at - stand_in.published_at[seq])
+        if posted_at is None or posted_at > deadline:
+            counts[priority]["missed"] += 1
+    return counts, latencies, pipeline
+
+
+def command_latencies(stand_in: StandIn, result: dict) -> List[float]:
+    """LINE コマンドを送ってから返信されるまでの時間"""
+    sent_at = result["webhook_sent_at"]
+    return [
+        replied_at - sent_at[token]
+        for token, replied_at in stand_in.line_replied_at.items()
+        if token in sent_at
+    ]
+
+
+def evaluate(args, stand_in: StandIn, result: dict, app_errors: List[str]) -> List[str]:
+    """レポートを表示し、違反したSLOの一覧を返す"""
+    from app.services.reply_scheduler import (
+        PRIORITY_MEMBERSHIP,
+        PRIORITY_NAMES,
+        PRIORITY_SUPER_CHAT,
+    )
+
+    outcomes, end_to_end, pipeline = comment_outcomes(
+        stand_in, result, args.reply_allowance
+    )
+    commands = command_latencies(stand_in, result)
+    webhook = result["webhook_latencies"]
+    lag = result["lag_samples"]
+    rss_growth_mb = result["rss_growth"] / (1024 * 1024)
+
+    print(f"chat messages generated : {len(stand_in.items):,}")
+    print(f"AI replies posted       : {len(stand_in.replies_posted)}")
+    print(f"LINE push / reply calls : {stand_in.line_pushes:,} / {stand_in.line_replies:,}")
+    print(f"webhook requests        : {len(webhook):,}")
+    print("comment outcomes (due = answered or past SLO + allowance) and reply latency (s):")
+    print(
+        f"  {'class':<11}{'due':>8}{'answered':>10}{'missed':>8}"
+        f"{'p50':>8}{'p99':>8}{'max':>8}"
+    )
+    for priority, name in PRIORITY_NAMES.items():
+        values = end_to_end[priority]
+        row = outcomes[priority]
+        print(
+            f"  {name:<11}{row['due']:>8,}{row['answered']:>10,}"
+            f"{row['missed']:>8,}{percentile(values, 50):>8.2f}"
+            f"{percentile(values, 99):>8.2f}{max(values, default=0.0):>8.2f}"
+        )
+    print("reply scheduler (answered / expired / dropped):")
+    for name, counts in result["reply_stats"].items():
+        print(
+            f"  {name:<11} {counts['answered']:>6,} / {counts['expired']:>6,}"
+            f" / {counts['dropped']:>6,}"
+        )
+    print(f"bot error notifications : {len(stand_in.error_notifications):,}")
+    print(f"app error log lines     : {len(app_errors):,}")
+    for line in sorted(set(app_errors))[:5]:
+        print(f"  {line}")
+    print(f"chat fetch lag p99 (s)  : {percentile(stand_in.fetch_lags, 99):.2f}")
+    print(f"reply pipeline p95 (s)  : {percentile(pipeline, 95):.3f}")
+    print(f"webhook p99 (ms)        : {percentile(webhook, 99) * 1000:.1f}")
+    print(f"command reply p99 (s)   : {percentile(commands, 99):.3f}")
+    print(f"event-loop lag p99 (ms) : {percentile(lag, 99) * 1000:.1f}")
+    print(f"RSS growth (MiB)        : {rss_growth_mb:.1f}")
+
+    violations = []
+    if result["bot_stopped_early"]:
+        violations.append(f"bot stopped before the end: {stand_in.last_notification}")
+    if not result["bot_stopped"]:
+        violations.append(f"bot did not stop on '{LINE_STOP_COMMAND}'")
+    if not stand_in.replies_posted:
+        violations.append("no AI reply was posted")
+    if stand_in.line_replies < len(webhook):
+        violations.append(
+            f"only {stand_in.line_replies} of {len(webhook)} LINE commands got a reply"
+        )
+    if app_errors:
+        violations.append(f"app logged {len(app_errors)} error line(s)")
+    if stand_in.error_notifications:
+        violations.append(
+            f"bot notified {len(stand_in.error_notifications)} error(s): "
+            f"{stand_in.error_notifications[0]}"
+        )
+    limits = {
+        PRIORITY_SUPER_CHAT: args.max_missed_super_chat,
+        PRIORITY_MEMBERSHIP: args.max_missed_membership,
+    }
+    for priority, limit in limits.items():
+        if outcomes[priority]["due"] == 0:
+            violations.append(f"no {PRIORITY_NAMES[priority]} comment reached its deadline")
+        elif outcomes[priority]["missed"] > limit:
+            violations.append(
+                f"{PRIORITY_NAMES[priority]}: {outcomes[priority]['missed']} of "
+                f"{outcomes[priority]['due']} comments missed their deadline > {limit}"
+            )
+    # 他のクラスは期限切れを許容するが、返信するなら期限内であること
+    for priority, values in end_to_end.items():
+        limit = result["class_slo_seconds"].get(priority, math.inf) + args.reply_allowance
+        if values and max(values) > limit:
+            violations.append(
+                f"{PRIORITY_NAMES[priority]} reply latency {max(values):.2f}s > {limit:.2f}s"
+            )
+    if percentile(commands, 99) > args.command_reply_p99:
+        violations.append(
+            f"command reply p99 {percentile(commands, 99):.3f}s > {args.command_reply_p99}s"
+        )
+    if percentile(stand_in.fetch_lags, 99) > args.fetch_lag_p99:
+        violations.append(
+            f"chat fetch lag p99 {percentile(stand_in.fetch_lags, 99):.2f}s > {args.fetch_lag_p99}s"
+        )
+    if percentile(pipeline, 95) > args.pipeline_p95:
+        violations.append(
+            f"reply pipeline p95 {percentile(pipeline, 95):.3f}s > {args.pipeline_p95}s"
+        )
+    if percentile(webhook, 99) * 1000 > args.webhook_p99_ms:
+        violations.append(
+            f"webhook p99 {percentile(webhook, 99) * 1000:.1f}ms > {args.webhook_p99_ms}ms"
+        )
+    if percentile(lag, 99) * 1000 > args.loop_lag_p99_ms:
+        violations.append(
+            f"event-loop lag p99 {percentile(lag, 99) * 1000:.1f}ms > {args.loop_lag_p99_ms}ms"
+        )
+    if rss_growth_mb > args.rss_growth_mb:
+        violations.append(f"RSS growth {rss_growth_mb:.1f}MiB > {args.rss_growth_mb}MiB")
+    return violations
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=360,
+        help="実行時間 (秒)。期限内のコメントは数えないため、最長のSLOより十分長くする",
+    )
+    parser.add_argument("--chat-rate", type=int, default=5000, help="コメント数/分")
+    parser.add_argument("--line-rate", type=int, default=600, help="LINEコマンド数/分")
+    parser.add_argument("--polling-interval-ms", type=int, default=2000)
+    parser.add_argument("--gemini-latency", type=float, default=0.5, help="Geminiスタブの応答時間 (秒)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="アプリのログをそのまま表示する")
+    # --- SLO ---
+    parser.add_argument(
+        "--reply-allowance",
+        type=float,
+        default=10,
+        help="優先度クラスのSLOに加えて許容する返信までの時間 (秒)",
+    )
+    parser.add_argument(
+        "--fetch-lag-p99",
+        type=float,
+        default=8,
+        help="コメントが投稿されてからボットに取得されるまでの p99 (秒)",
+    )
+    parser.add_argument(
+        "--max-missed-super-chat",
+        type=int,
+        default=0,
+        help="期限までに返信されなくてもよいスーパーチャットの件数",
+    )
+    parser.add_argument(
+        "--max-missed-membership",
+        type=int,
+        default=0,
+        help="期限までに返信されなくてもよいメンバーシップイベントの件数",
+    )
+    parser.add_argument("--pipeline-p95", type=float, default=4, help="返信処理 p95 (秒)")
+    parser.add_argument("--webhook-p99-ms", type=float, default=250)
+    parser.add_argument(
+        "--command-reply-p99",
+        type=float,
+        default=2,
+        help="LINE コマンドを送ってから返信されるまでの p99 (秒)",
+    )
+    parser.add_argument("--loop-lag-p99-ms", type=float, default=100)
+    parser.add_argument("--rss-growth-mb", type=float, default=64)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    configure_environment(base_url)
+
+    stand_in = StandIn(
+        chat_rate_per_minute=args.chat_rate,
+        polling_interval_millis=args.polling_interval_ms,
+        gemini_latency=args.gemini_latency,
+        seed=args.seed,
+    )
+    server, thread = start_stand_in(stand_in, port)
+    # アプリのログは常に記録してエラーを集計し、--verbose の場合はそのまま表示もする
+    app_log = AppLog(echo=args.verbose)
+    try:
+        with contextlib.redirect_stdout(app_log):
+            result = asyncio.run(run_simulation(args, stand_in, base_url))
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    violations = evaluate(args, stand_in, result, app_log.error_lines())
+    if violations:
+        print("\nSLO violations:")
+        for violation in violations:
+            print(f"  - {violation}")
+        sys.exit(1)
+    print("\nAll SLOs met.")
+
+
+if __name__ == "__main__":
+    main()
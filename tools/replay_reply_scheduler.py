@@ -0,0 +1,296 @@
+# tools/replay_reply_scheduler.py
+"""
+ReplyScheduler のリプレイ試験。
+
+時計を差し替えて決定的にコメントを流し込み、以下を確認する。
+失敗があれば終了コード 1 で終わる。
+
+- 優先度順 (スーパーチャット > メンバーシップ > モデレーター > メンバー > 一般、同クラスはティア順)
+- 1分あたりの返信予算
+- レイテンシSLOを超えたコメントの期限切れ
+- キュー上限を超えた場合、期限切れを取り除いた上で最も優先度の低いコメントが破棄されること
+- 返信に失敗したバッチを戻しても順番と予算が保たれること
+- 予約枠のあるクラスが上位クラスの混雑中も返信されること
+
+最後に 5,000 コメント/分の負荷を本番の設定 (app.core.config) でリプレイし、
+優先度クラスごとに以下を確認する。
+
+- スーパーチャット・メンバーシップは1件も期限切れ・破棄にならない
+- 予約枠のあるクラスは、予約枠の分だけ返信される
+
+使い方:
+    python -m tools.replay_reply_scheduler [--minutes 10] [--chat-rate 5000]
+"""
+
+import argparse
+import random
+import sys
+from typing import Dict, List
+
+from tools.sim_traffic import (
+    ensure_settings_environment,
+    random_author_flags,
+    random_event_type,
+    random_tier,
+)
+
+ensure_settings_environment()
+
+from app.core.config import settings  # noqa: E402
+from app.services.chat_message import ChatMessage  # noqa: E402
+from app.services.reply_scheduler import (  # noqa: E402
+    PRIORITY_MEMBERSHIP,
+    PRIORITY_NAMES,
+    PRIORITY_NORMAL,
+    PRIORITY_SUPER_CHAT,
+    ReplyScheduler,
+    classify_message,
+    create_reply_scheduler,
+)
+
+# 取りこぼしを許さないクラス
+NO_MISS_PRIORITIES = (PRIORITY_SUPER_CHAT, PRIORITY_MEMBERSHIP)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_scheduler(clock: FakeClock, **overrides) -> ReplyScheduler:
+    """本番の設定でスケジューラを作り、試験に必要な項目だけを上書きする"""
+    scheduler = create_reply_scheduler(settings, clock=clock)
+    for name, value in overrides.items():
+        setattr(scheduler, name, value)
+    return scheduler
+
+
+def message(id: str, type: str = "textMessageEvent", **kwargs) -> ChatMessage:
+    return ChatMessage(id=id, type=type, author_name=id, text=id, **kwargs)
+
+
+def ids(batch) -> List[str]:
+    return [queued.message.id for queued in batch]
+
+
+failures: List[str] = []
+
+
+def check(condition: bool, description: str):
+    print(f"  [{'OK' if condition else 'NG'}] {description}")
+    if not condition:
+        failures.append(description)
+
+
+def replay_priority_order():
+    print("priority order")
+    scheduler = make_scheduler(FakeClock(), batch_size=6, reserved_slots={})
+    scheduler.enqueue(message("normal"))
+    scheduler.enqueue(message("sponsor", is_sponsor=True))
+    scheduler.enqueue(message("moderator", is_moderator=True, is_sponsor=True))
+    scheduler.enqueue(message("member", type="newSponsorEvent"))
+    # ¥1,000 (ティア4) と $50 (ティア7)。amountMicros では円の方が大きくなる
+    scheduler.enqueue(message("sc-jpy-1000", type="superChatEvent", tier=4))
+    scheduler.enqueue(message("sc-usd-50", type="superChatEvent", tier=7))
+    check(
+        ids(scheduler.next_batch())
+        == ["sc-usd-50", "sc-jpy-1000", "member", "moderator", "sponsor", "normal"],
+        "super chat (by tier) > membership > moderator > sponsor > normal",
+    )
+
+
+def replay_budget():
+    print("per-minute budget")
+    clock = FakeClock()
+    # 予算だけを確認するため、期限切れは無効にする
+    scheduler = make_scheduler(
+        clock, replies_per_minute=2, batch_size=1, latency_slo_seconds={}
+    )
+    for i in range(5):
+        scheduler.enqueue(message(f"m{i}"))
+
+    for _ in range(2):
+        scheduler.mark_replied(scheduler.next_batch())
+        clock.now += 5
+    check(scheduler.next_batch() == [], "no batch once the budget is spent")
+
+    clock.now = 60
+    check(ids(scheduler.next_batch()) == ["m2"], "budget frees up after 60 seconds")
+
+
+def replay_expiry():
+    print("SLO expiry")
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    scheduler.enqueue(message("normal"))
+    scheduler.enqueue(message("sc", type="superChatEvent"))
+    clock.now = scheduler.latency_slo_seconds[PRIORITY_NORMAL] + 1
+    check(ids(scheduler.next_batch()) == ["sc"], "expired normal comment is skipped")
+    check(scheduler.expired[PRIORITY_NORMAL] == 1, "expiry is counted per class")
+    check(scheduler.expired[PRIORITY_SUPER_CHAT] == 0, "super chat is still within SLO")
+
+
+def replay_queue_full():
+    print("queue full")
+    scheduler = make_scheduler(FakeClock(), max_queue_size=3, reserved_slots={})
+    scheduler.enqueue(message("sc", type="superChatEvent"))
+    scheduler.enqueue(message("normal-old"))
+    scheduler.enqueue(message("normal-new"))
+    scheduler.enqueue(message("member", type="newSponsorEvent"))
+    check(len(scheduler) == 3, "queue stays at max_queue_size")
+    check(scheduler.dropped[PRIORITY_NORMAL] == 1, "a normal comment was dropped")
+    check(
+        ids(scheduler.next_batch()) == ["sc", "member", "normal-old"],
+        "the newest lowest-priority comment is the one dropped",
+    )
+
+
+def replay_expire_before_drop():
+    print("queue full with expired comments")
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, max_queue_size=2)
+    scheduler.enqueue(message("normal"))
+    clock.now = scheduler.latency_slo_seconds[PRIORITY_NORMAL] + 1
+    scheduler.enqueue(message("sc", type="superChatEvent"))
+    scheduler.enqueue(message("member", type="newSponsorEvent"))
+    check(
+        scheduler.expired[PRIORITY_NORMAL] == 1
+        and sum(scheduler.dropped.values()) == 0,
+        "expired comments are removed before anything is dropped",
+    )
+    check(len(scheduler) == 2, "both live comments stay queued")
+
+
+def replay_reserved_slots():
+    print("reserved slots")
+    scheduler = make_scheduler(
+        FakeClock(), batch_size=3, reserved_slots={PRIORITY_NORMAL: 1}
+    )
+    for i in range(5):
+        scheduler.enqueue(message(f"sc{i}", type="superChatEvent"))
+    scheduler.enqueue(message("normal"))
+    check(
+        ids(scheduler.next_batch()) == ["sc0", "sc1", "normal"],
+        "a reserved slot goes to a lower class while super chats are waiting",
+    )
+    check(
+        ids(scheduler.next_batch()) == ["sc2", "sc3", "sc4"],
+        "unused reserved slots are filled in priority order",
+    )
+
+
+def replay_requeue():
+    print("requeue after a failed reply")
+    scheduler = make_scheduler(FakeClock(), replies_per_minute=1, batch_size=2)
+    for i in range(3):
+        scheduler.enqueue(message(f"m{i}"))
+    scheduler.requeue(scheduler.next_batch())
+    check(scheduler.answered[PRIORITY_NORMAL] == 0, "failed batch is not counted")
+    check(
+        ids(scheduler.next_batch()) == ["m0", "m1"],
+        "requeued comments keep their place and budget is not spent",
+    )
+
+
+def replay_load(minutes: int, chat_rate: int, polling_interval: float, seed: int):
+    """
+    本番の設定と本番に近い比率のコメントで、ポーリング間隔ごとに返信を試みる。
+    終了時点でまだSLO内のコメントは、取りこぼしとしても到着数としても数えない。
+    """
+    print(f"load replay: {chat_rate:,} comments/min for {minutes} min")
+    rng = random.Random(seed)
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    per_poll = chat_rate * polling_interval / 60
+    arrived: Dict[int, int] = {p: 0 for p in PRIORITY_NAMES}
+    replies = 0
+
+    seq = 0
+    carry = 0.0
+    while clock.now < minutes * 60:
+        carry += per_poll
+        while carry >= 1:
+            carry -= 1
+            event_type = random_event_type(rng)
+            is_moderator, is_sponsor = random_author_flags(rng)
+            chat = message(
+                f"m{seq}",
+                type=event_type,
+                is_moderator=is_moderator,
+                is_sponsor=is_sponsor,
+                tier=random_tier(rng, event_type),
+            )
+            arrived[classify_message(chat)] += 1
+            scheduler.enqueue(chat)
+            seq += 1
+        batch = scheduler.next_batch()
+        if batch:
+            scheduler.mark_replied(batch)
+            replies += 1
+        clock.now += polling_interval
+
+    for entry in scheduler._heap:
+        arrived[entry[3].priority] -= 1
+
+    stats = scheduler.stats()
+    print(
+        f"  {'class':<11}{'arrived':>10}{'answered':>10}"
+        f"{'expired':>10}{'dropped':>10}{'reserved':>10}"
+    )
+    for p, name in PRIORITY_NAMES.items():
+        counts = stats[name]
+        print(
+            f"  {name:<11}{arrived[p]:>10,}{counts['answered']:>10,}"
+            f"{counts['expired']:>10,}{counts['dropped']:>10,}"
+            f"{scheduler.reserved_slots.get(p, 0):>10}"
+        )
+
+    check(
+        replies <= scheduler.replies_per_minute * minutes,
+        f"replies stay within the budget ({replies} <= "
+        f"{scheduler.replies_per_minute} x {minutes} min)",
+    )
+    for p in NO_MISS_PRIORITIES:
+        name = PRIORITY_NAMES[p]
+        check(
+            stats[name]["expired"] + stats[name]["dropped"] == 0,
+            f"{name}: no comment expires or is dropped",
+        )
+    for p, slots in scheduler.reserved_slots.items():
+        name = PRIORITY_NAMES[p]
+        expected = min(arrived[p], slots * replies)
+        check(
+            stats[name]["answered"] >= expected,
+            f"{name}: reserved slots are honoured "
+            f"({stats[name]['answered']:,} >= {expected:,})",
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--minutes", type=int, default=10)
+    parser.add_argument("--chat-rate", type=int, default=5000, help="コメント数/分")
+    parser.add_argument("--polling-interval", type=float, default=5.0, help="秒")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    replay_priority_order()
+    replay_budget()
+    replay_expiry()
+    replay_queue_full()
+    replay_expire_before_drop()
+    replay_reserved_slots()
+    replay_requeue()
+    replay_load(args.minutes, args.chat_rate, args.polling_interval, args.seed)
+
+    if failures:
+        print(f"\n{len(failures)} check(s) failed")
+        sys.exit(1)
+    print("\nAll checks passed.")
+
+
+if __name__ == "__main__":
+    main()